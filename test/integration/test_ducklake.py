@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 # /// script
-# dependencies = ["duckdb==1.5.5"]
+# dependencies = ["duckdb==1.5.5", "pytest>=7.0"]
 # requires-python = ">=3.10"
 # ///
 """
@@ -14,23 +14,33 @@ Uses native CREATE SEMANTIC VIEW ... AS ... DDL syntax exclusively.
 Query interface (semantic_view() / explain_semantic_view()) is unchanged.
 
 Test cases:
+    0. Seed tables are visible through the attached DuckLake catalog
     1. Define semantic view over DuckLake/Iceberg table (native DDL)
     2. Query the DuckLake-backed semantic view with dimension
     3. Metrics-only query (global aggregate)
     4. Explain on DuckLake-backed view
     5. Typed BIGINT output — count(*) returns Python int, not str
     6. Date dimension with date_trunc — ordered_at returns datetime.date values
+    7. Output columns follow the requested dimensions then metrics
+       (parametrized over several dimension/metric combinations)
 
 Prerequisites:
     Run `just setup-ducklake` first to download jaffle-shop data and
     create the DuckLake catalog.
 
+The tests share one module-scoped connection (extensions loaded and the
+DuckLake catalog attached once) and one module-scoped semantic view
+fixture, so no test depends on another having run first.
+
 Usage:
     uv run test/integration/test_ducklake.py
 
     Or via Justfile:
     just test-iceberg
 
+    Or directly under pytest:
+    pytest test/integration/test_ducklake.py
+
 Exit codes:
     0 = all assertions passed
     1 = test failure or setup error
@@ -39,9 +49,13 @@ Requirement: TEST-04 (integration test with Apache Iceberg table source)
 """
 
 import datetime
+import os
 import sys
 from pathlib import Path
 
+import duckdb
+import pytest
+
 # Add test/integration to path for helpers import
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 from test_ducklake_helpers import (
@@ -63,40 +77,55 @@ JAFFLE_DATA_DIR = DATA_DIR / "jaffle_data"
 # Extension path (resolved via helpers)
 EXTENSION_PATH = get_extension_path()
 
+# Semantic view under test. Actual jaffle-shop raw_orders columns: id,
+# customer, ordered_at, store_id, subtotal, tax_paid, order_total
+VIEW_NAME = "jaffle_orders"
+VIEW_DDL = f"""
+    CREATE SEMANTIC VIEW {VIEW_NAME} AS
+    TABLES (o AS jaffle.raw_orders PRIMARY KEY (id))
+    DIMENSIONS (
+        o.store_id AS store_id,
+        o.ordered_at AS date_trunc('day', ordered_at)
+    )
+    METRICS (
+        o.order_count AS count(*),
+        o.total_revenue AS sum(order_total)
+    )
+"""
+
+
+def _missing(path):
+    """Return ``path`` as a string if it does not exist, else None."""
+    try:
+        os.stat(path)
+    except FileNotFoundError:
+        return str(path)
+    return None
+
 
 def check_prerequisites():
-    """Verify all required files exist."""
-    missing = []
-    if not CATALOG_DB.exists():
-        missing.append(str(CATALOG_DB))
-    if not DUCKLAKE_FILE.exists():
-        missing.append(str(DUCKLAKE_FILE))
-    if not EXTENSION_PATH.exists():
-        missing.append(str(EXTENSION_PATH))
+    """Fail with setup instructions unless all required files exist."""
+    missing = [m for m in map(_missing, (CATALOG_DB, DUCKLAKE_FILE, EXTENSION_PATH)) if m]
 
     if missing:
-        print("ERROR: Missing prerequisites:")
-        for m in missing:
-            print(f"  - {m}")
-        print()
-        print("Run the following first:")
-        print("  just build          # Build the extension")
-        print("  just setup-ducklake # Download data and create DuckLake catalog")
-        sys.exit(1)
-
+        pytest.fail(
+            "Missing prerequisites:\n"
+            + "".join(f"  - {m}\n" for m in missing)
+            + "\nRun the following first:\n"
+            "  just build          # Build the extension\n"
+            "  just setup-ducklake # Download data and create DuckLake catalog",
+            pytrace=False,
+        )
 
-def run_tests():
-    """Run the DuckLake integration tests."""
-    import duckdb
 
-    print(f"DuckDB version: {duckdb.__version__}")
-    print(f"Extension: {EXTENSION_PATH}")
-    print(f"DuckLake catalog: {DUCKLAKE_FILE}")
-    print()
+@pytest.fixture(scope="module")
+def con():
+    """Connection to the catalog database with both extensions loaded and DuckLake attached."""
+    check_prerequisites()
 
     # Connect to the catalog database (which has DuckLake already set up).
     ext_dir = get_ext_dir()
-    con = duckdb.connect(
+    c = duckdb.connect(
         str(CATALOG_DB),
         config={
             "allow_unsigned_extensions": "true",
@@ -105,193 +134,126 @@ def run_tests():
     )
 
     # Load extensions and attach DuckLake catalog
-    load_extension(con, EXTENSION_PATH)
-    attach_ducklake(con, str(DUCKLAKE_FILE), str(JAFFLE_DATA_DIR) + "/", alias="jaffle")
-
-    # Verify DuckLake tables are accessible
-    tables = con.execute(
-        "SELECT table_name FROM information_schema.tables "
-        "WHERE table_catalog = 'jaffle' ORDER BY table_name"
-    ).fetchall()
-    table_names = [t[0] for t in tables]
-    print(f"DuckLake tables: {table_names}")
+    load_extension(c, EXTENSION_PATH)
+    attach_ducklake(c, str(DUCKLAKE_FILE), str(JAFFLE_DATA_DIR) + "/", alias="jaffle")
+    yield c
+    c.close()
+
+
+@pytest.fixture(scope="module")
+def jaffle_orders(con):
+    """Semantic view over the DuckLake raw_orders table, dropped after the module."""
+    con.execute(VIEW_DDL)
+    yield VIEW_NAME
+    con.execute(f"DROP SEMANTIC VIEW IF EXISTS {VIEW_NAME}")
+
+
+def test_ducklake_tables_accessible(con):
+    """Test 0: Seed tables are visible through the attached DuckLake catalog."""
+    (table_names,) = con.execute(
+        "SELECT coalesce(list(table_name ORDER BY table_name), []) "
+        "FROM information_schema.tables "
+        "WHERE table_catalog = 'jaffle'"
+    ).fetchone()
     assert "raw_orders" in table_names, "raw_orders table not found in DuckLake"
     assert "raw_customers" in table_names, "raw_customers table not found in DuckLake"
 
-    passed = 0
-    failed = 0
 
-    # ---- Test 1: Define semantic view over DuckLake table ----
-    # Actual jaffle-shop raw_orders columns: id, customer, ordered_at,
-    # store_id, subtotal, tax_paid, order_total
-    print()
-    print("Test 1: Define semantic view over DuckLake/Iceberg table")
-    try:
-        con.execute(
-            """
-            CREATE SEMANTIC VIEW jaffle_orders AS
-            TABLES (o AS jaffle.raw_orders PRIMARY KEY (id))
-            DIMENSIONS (
-                o.store_id AS store_id,
-                o.ordered_at AS date_trunc('day', ordered_at)
-            )
-            METRICS (
-                o.order_count AS count(*),
-                o.total_revenue AS sum(order_total)
-            )
-            """
-        )
-        print("  PASS: View defined successfully")
-        passed += 1
-    except Exception as e:
-        print(f"  FAIL: {e}")
-        failed += 1
-
-    # ---- Test 2: Query the DuckLake-backed semantic view ----
-    print()
-    print("Test 2: Query DuckLake-backed semantic view")
-    try:
-        result = con.execute(
-            """
-            SELECT * FROM semantic_view(
-                'jaffle_orders',
-                dimensions := ['store_id'],
-                metrics := ['order_count']
-            )
-            """
-        ).fetchall()
-        print(f"  Result: {result}")
-        assert len(result) > 0, "Expected at least one row"
-        store_ids = {row[0] for row in result}
-        print(f"  Store IDs found: {len(store_ids)}")
-        assert len(store_ids) > 0, "Expected at least one distinct store_id"
-        print("  PASS: Query returned correct results")
-        passed += 1
-    except Exception as e:
-        print(f"  FAIL: {e}")
-        failed += 1
-
-    # ---- Test 3: Metrics-only query (global aggregate) ----
-    print()
-    print("Test 3: Global aggregate over DuckLake table")
-    try:
-        result = con.execute(
-            """
-            SELECT * FROM semantic_view(
-                'jaffle_orders',
-                metrics := ['order_count', 'total_revenue']
-            )
-            """
-        ).fetchall()
-        print(f"  Result: {result}")
-        assert len(result) == 1, f"Expected 1 row, got {len(result)}"
-        order_count = int(result[0][0])
-        total_revenue = int(result[0][1])
-        assert order_count > 0, f"Expected positive order_count, got {order_count}"
-        assert total_revenue > 0, f"Expected positive total_revenue, got {total_revenue}"
-        print(f"  Total orders: {order_count}, Total revenue: {total_revenue}")
-        print("  PASS: Global aggregate returned correct results")
-        passed += 1
-    except Exception as e:
-        print(f"  FAIL: {e}")
-        failed += 1
-
-    # ---- Test 4: Explain on DuckLake-backed view ----
-    print()
-    print("Test 4: Explain on DuckLake-backed semantic view")
-    try:
-        result = con.execute(
-            """
-            SELECT * FROM explain_semantic_view(
-                'jaffle_orders',
-                dimensions := ['store_id'],
-                metrics := ['order_count']
-            )
-            """
-        ).fetchall()
-        lines = [row[0] for row in result]
-        explain_text = "\n".join(lines)
-        assert "jaffle_orders" in explain_text, "Expected view name in explain output"
-        assert "raw_orders" in explain_text, "Expected base table in explain output"
-        print(f"  Explain output: {len(lines)} lines")
-        print("  PASS: Explain output contains expected metadata")
-        passed += 1
-    except Exception as e:
-        print(f"  FAIL: {e}")
-        failed += 1
-
-    # ---- Test 5: Typed BIGINT output ----
-    print()
-    print("Test 5: Typed BIGINT output for count(*) metric")
-    try:
-        result = con.execute(
-            """
-            SELECT * FROM semantic_view('jaffle_orders', metrics := ['order_count'])
-            """
-        ).fetchall()
-        assert len(result) == 1, f"Expected 1 row, got {len(result)}"
-        order_count_val = result[0][0]
-        assert isinstance(order_count_val, int), (
-            f"Expected int (BIGINT) for order_count, got "
-            f"{type(order_count_val).__name__}: {order_count_val!r}"
+def test_define_semantic_view(con, jaffle_orders):
+    """Test 1: Define semantic view over DuckLake/Iceberg table."""
+    views = con.execute(f"SHOW SEMANTIC VIEWS LIKE '{jaffle_orders}'").fetchall()
+    assert len(views) == 1, f"Expected {jaffle_orders} to be registered, got {views!r}"
+
+
+def test_query_with_dimension(con, jaffle_orders):
+    """Test 2: Query DuckLake-backed semantic view."""
+    row_count, store_id_count = con.execute(
+        "SELECT count(*), count(DISTINCT store_id) "
+        "FROM semantic_view(?, dimensions := ?, metrics := ?)",
+        [jaffle_orders, ["store_id"], ["order_count"]],
+    ).fetchone()
+    assert row_count > 0, "Expected at least one row"
+    assert store_id_count > 0, "Expected at least one distinct store_id"
+
+
+def test_global_aggregate(con, jaffle_orders):
+    """Test 3: Global aggregate over DuckLake table."""
+    result = con.execute(
+        "SELECT * FROM semantic_view(?, metrics := ?)",
+        [jaffle_orders, ["order_count", "total_revenue"]],
+    ).fetchall()
+    assert len(result) == 1, f"Expected 1 row, got {len(result)}"
+    order_count = int(result[0][0])
+    total_revenue = int(result[0][1])
+    assert order_count > 0, f"Expected positive order_count, got {order_count}"
+    assert total_revenue > 0, f"Expected positive total_revenue, got {total_revenue}"
+
+
+def test_explain(con, jaffle_orders):
+    """Test 4: Explain on DuckLake-backed semantic view."""
+    line_count, explain_text = con.execute(
+        "SELECT count(*), string_agg(explain_output, chr(10)) "
+        "FROM explain_semantic_view(?, dimensions := ?, metrics := ?)",
+        [jaffle_orders, ["store_id"], ["order_count"]],
+    ).fetchone()
+    assert line_count > 0, "Expected explain output"
+    assert "jaffle_orders" in explain_text, "Expected view name in explain output"
+    assert "raw_orders" in explain_text, "Expected base table in explain output"
+
+
+def test_typed_bigint_output(con, jaffle_orders):
+    """Test 5: Typed BIGINT output for count(*) metric."""
+    result = con.execute(
+        "SELECT * FROM semantic_view(?, metrics := ?)",
+        [jaffle_orders, ["order_count"]],
+    ).fetchall()
+    assert len(result) == 1, f"Expected 1 row, got {len(result)}"
+    order_count_val = result[0][0]
+    assert isinstance(order_count_val, int), (
+        f"Expected int (BIGINT) for order_count, got "
+        f"{type(order_count_val).__name__}: {order_count_val!r}"
+    )
+
+
+def test_date_dimension(con, jaffle_orders):
+    """Test 6: Date dimension with date_trunc('day', ...)."""
+    (dates,) = con.execute(
+        "SELECT list(ordered_at) FROM semantic_view(?, dimensions := ?, metrics := ?)",
+        [jaffle_orders, ["ordered_at"], ["order_count"]],
+    ).fetchone()
+    assert dates, "Expected at least one row"
+    # All date values should be datetime.date instances
+    for value in dates:
+        assert isinstance(value, datetime.date), (
+            f"Expected datetime.date for ordered_at, got {type(value).__name__}: {value!r}"
         )
-        print(f"  order_count type: {type(order_count_val).__name__} = {order_count_val}")
-        print("  PASS: count(*) returns BIGINT (Python int)")
-        passed += 1
-    except Exception as e:
-        print(f"  FAIL: {e}")
-        failed += 1
-
-    # ---- Test 6: Date dimension with date_trunc ----
-    print()
-    print("Test 6: Date dimension with date_trunc('day', ...)")
-    try:
-        result = con.execute(
-            """
-            SELECT * FROM semantic_view(
-                'jaffle_orders',
-                dimensions := ['ordered_at'],
-                metrics := ['order_count']
-            )
-            """
-        ).fetchall()
-        assert len(result) > 0, "Expected at least one row"
-        # All date values should be datetime.date instances
-        for row in result:
-            assert isinstance(row[0], datetime.date), (
-                f"Expected datetime.date for ordered_at, got {type(row[0]).__name__}: {row[0]!r}"
-            )
-        print(f"  Date dimension rows: {len(result)} distinct days")
-        print("  PASS: ordered_at returns datetime.date values")
-        passed += 1
-    except Exception as e:
-        print(f"  FAIL: {e}")
-        failed += 1
-
-    # ---- Cleanup ----
-    print()
-    print("Cleanup: dropping semantic view")
-    try:
-        con.execute("DROP SEMANTIC VIEW jaffle_orders")
-    except Exception:
-        pass  # Best-effort cleanup
-
-    con.close()
-
-    # ---- Summary ----
-    print()
-    print(f"Results: {passed} passed, {failed} failed, {passed + failed} total")
-    if failed > 0:
-        print("FAILED")
-        sys.exit(1)
-    else:
-        print("ALL PASSED")
 
 
-def main():
-    check_prerequisites()
-    run_tests()
+@pytest.mark.parametrize(
+    ("dimensions", "metrics", "expected_columns"),
+    [
+        (["store_id"], ["order_count"], ["store_id", "order_count"]),
+        (["ordered_at"], ["order_count"], ["ordered_at", "order_count"]),
+        (None, ["order_count", "total_revenue"], ["order_count", "total_revenue"]),
+        (
+            ["store_id", "ordered_at"],
+            ["total_revenue", "order_count"],
+            ["store_id", "ordered_at", "total_revenue", "order_count"],
+        ),
+    ],
+    ids=["by_store", "by_day", "global", "two_dimensions"],
+)
+def test_output_columns(con, jaffle_orders, dimensions, metrics, expected_columns):
+    """Test 7: Output columns are the requested dimensions, then metrics, in order."""
+    if dimensions is None:
+        sql = "SELECT * FROM semantic_view(?, metrics := ?) LIMIT 0"
+        params = [jaffle_orders, metrics]
+    else:
+        sql = "SELECT * FROM semantic_view(?, dimensions := ?, metrics := ?) LIMIT 0"
+        params = [jaffle_orders, dimensions, metrics]
+    columns = [d[0] for d in con.execute(sql, params).description]
+    assert columns == expected_columns
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -36,6 +36,27 @@ def get_extension_path() -> Path:
     return get_project_root() / "build" / "debug" / "semantic_views.duckdb_extension"
 
 
+def _installed_copy_is_current(con, extension_path: Path) -> bool:
+    """
+    Return True if the cached semantic_views install matches ``extension_path``.
+
+    The cached copy is current when it is at least as new as the built binary
+    and the same size; anything else (missing, older, different build) needs
+    a reinstall.
+    """
+    row = con.execute(
+        "SELECT install_path FROM duckdb_extensions() WHERE extension_name = 'semantic_views'"
+    ).fetchone()
+    if not row or not row[0]:
+        return False
+    try:
+        cached = os.stat(row[0])
+    except FileNotFoundError:
+        return False
+    built = os.stat(extension_path)
+    return cached.st_mtime >= built.st_mtime and cached.st_size == built.st_size
+
+
 def load_extension(con, extension_path: Path) -> None:
     """
     Install and load the semantic_views extension plus DuckLake.
@@ -45,10 +66,20 @@ def load_extension(con, extension_path: Path) -> None:
         extension_path: Path to the semantic_views .duckdb_extension file.
     """
     # FORCE INSTALL ensures the freshly-built binary overwrites any stale cached copy
-    # in the project-local extension directory.
-    con.execute(f"FORCE INSTALL '{extension_path}'")
-    con.execute("LOAD semantic_views")
-    con.execute("LOAD ducklake")
+    # in the project-local extension directory. It copies the whole binary, so it is
+    # skipped when the cached copy already matches the build.
+    if not _installed_copy_is_current(con, extension_path):
+        con.execute(f"FORCE INSTALL '{extension_path}'")
+    loaded = {
+        name
+        for (name,) in con.execute(
+            "SELECT extension_name FROM duckdb_extensions() "
+            "WHERE loaded AND extension_name IN ('semantic_views', 'ducklake')"
+        ).fetchall()
+    }
+    for name in ("semantic_views", "ducklake"):
+        if name not in loaded:
+            con.execute(f"LOAD {name}")
 
 
 def attach_ducklake(con, ducklake_file: str, data_dir: str, alias: str = "jaffle") -> None: